@@ -107,7 +107,7 @@ from image_utils import (
     guess_media_extension,
     save_upload_file,
 )
-from telegram_utils import send_telegram_message, send_media_to_telegram_group, get_chat_member, send_telegram_single_media
+from telegram_utils import send_telegram_message, send_media_to_telegram_group, get_chat_member, send_telegram_single_media, close_telegram_session
 from user_utils import get_user_with_psn, format_profile_response
 from mastery_utils import find_category_by_key, parse_tags
 from mastery_config import load_mastery_config
@@ -175,6 +175,14 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+async def shutdown_telegram_session():
+    """
+    Закрывает общую HTTP-сессию Telegram Bot API при остановке приложения.
+    """
+    await close_telegram_session()
+
+
 @app.middleware("http")
 async def filter_bot_requests(request: Request, call_next):
     """
@@ -469,14 +477,9 @@ async def get_users_list(user_id: int = Depends(get_current_user)):
         for u in users:
             uid = u.get('user_id')
             
-            # ТРОФЕИ (гарантированно заполняем сначала)
-            try:
-                trophies_data = get_trophies(DB_PATH, uid) if uid else {'trophies': [], 'active_trophies': []}
-                all_trophies = trophies_data.get('trophies', []) or []
-                active_trophies = trophies_data.get('active_trophies', []) or []
-            except Exception:
-                all_trophies = []
-                active_trophies = []
+            # ТРОФЕИ (уже получены из get_all_users одним запросом)
+            all_trophies = u.pop('trophies', None) or []
+            active_trophies = u.get('active_trophies') or []
             u['active_trophies'] = active_trophies
             u['trophies_count'] = len(all_trophies)
             u['active_trophies_count'] = len(active_trophies)
@@ -553,6 +556,7 @@ async def get_users_list(user_id: int = Depends(get_current_user)):
             u['active_theme_key'] = u.get('active_theme_key', 'default')
             u['has_public_builds'] = u.get('has_public_builds', False)
             u.pop('mastery', None)
+            u.pop('trophies', None)
     
     return {"users": users}
 
@@ -3835,7 +3839,8 @@ async def get_trophies_list(user_id: int = Depends(get_current_user)):
     try:
         # Загружаем обычные трофеи
         config = load_trophy_config()
-        trophies_list = config.get('trophies', [])
+        # Конфиг закеширован и общий для всех запросов, поэтому изменяем только копии трофеев
+        trophies_list = [dict(trophy) for trophy in config.get('trophies', [])]
         
         # Добавляем поле is_season для обычных трофеев
         for trophy in trophies_list:
@@ -1267,7 +1267,8 @@ def get_all_users(db_path: str) -> List[Dict[str, Any]]:
         db_path: Путь к файлу базы данных
     
     Returns:
-        Список словарей с данными пользователей (user_id, psn_id, avatar_url и mastery уровни)
+        Список словарей с данными пользователей (user_id, psn_id, avatar_url,
+        mastery уровни, trophies и active_trophies)
     """
     try:
         with db_connection(db_path) as cursor:
@@ -1280,7 +1281,11 @@ def get_all_users(db_path: str) -> List[Dict[str, Any]]:
                        COALESCE(m.hellmode, 0) as hellmode,
                        COALESCE(m.raid, 0) as raid,
                        COALESCE(m.speedrun, 0) as speedrun,
-                       COALESCE(m.glitch, 0) as glitch
+                       COALESCE(m.glitch, 0) as glitch,
+                       (SELECT t.trophies FROM trophies t
+                        WHERE t.user_id = u.user_id LIMIT 1) as trophies,
+                       (SELECT t.active_trophies FROM trophies t
+                        WHERE t.user_id = u.user_id LIMIT 1) as active_trophies
                 FROM users u
                 LEFT JOIN mastery m ON u.user_id = m.user_id
                 WHERE u.psn_id IS NOT NULL AND u.psn_id != ''
@@ -1302,7 +1307,9 @@ def get_all_users(db_path: str) -> List[Dict[str, Any]]:
                         'raid': row[6],
                         'speedrun': row[7],
                         'glitch': row[8]
-                    }
+                    },
+                    'trophies': parse_comma_separated_list(row[9]),
+                    'active_trophies': parse_comma_separated_list(row[10])
                 })
             
             return users
@@ -1813,6 +1820,23 @@ def update_build_photos(db_path: str, build_id: int, photo_1_url: str, photo_2_u
 
 # ========== ФУНКЦИИ ДЛЯ РАБОТЫ С ТРОФЕЯМИ ==========
 
+def _create_trophies_row(cursor: sqlite3.Cursor, user_id: int) -> None:
+    """
+    Создает пустую запись трофеев пользователя через уже открытый курсор.
+    
+    PSN ID берется из таблицы users в том же запросе, без отдельного
+    подключения к БД.
+    
+    Args:
+        cursor: Курсор БД
+        user_id: ID пользователя
+    """
+    cursor.execute('''
+        INSERT INTO trophies (user_id, psn_id, trophies, active_trophies)
+        VALUES (?, COALESCE((SELECT psn_id FROM users WHERE user_id = ?), ''), '', '')
+    ''', (user_id, user_id))
+
+
 def init_user_trophies(db_path: str, user_id: int, psn_id: str) -> bool:
     """
     Создает запись трофеев для нового пользователя.
@@ -1830,16 +1854,12 @@ def init_user_trophies(db_path: str, user_id: int, psn_id: str) -> bool:
             if cursor is None:
                 return False
             
-            # Проверяем существует ли запись
-            cursor.execute('SELECT user_id FROM trophies WHERE user_id = ?', (user_id,))
-            if cursor.fetchone() is not None:
-                return True  # Запись уже существует
-            
-            # Создаем новую запись
+            # Создаем запись одним запросом, если её еще нет
             cursor.execute('''
                 INSERT INTO trophies (user_id, psn_id, trophies, active_trophies)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, psn_id or '', '', ''))
+                SELECT ?, ?, '', ''
+                WHERE NOT EXISTS (SELECT 1 FROM trophies WHERE user_id = ?)
+            ''', (user_id, psn_id or '', user_id))
             
             return True
         
@@ -1920,11 +1940,8 @@ def add_trophy(db_path: str, user_id: int, trophy_key: str) -> bool:
             row = cursor.fetchone()
             
             if not row:
-                # Если записи нет, создаем её
-                user = get_user(db_path, user_id)
-                psn_id = user.get('psn_id', '') if user else ''
-                if not init_user_trophies(db_path, user_id, psn_id):
-                    return False
+                # Если записи нет, создаем её в той же транзакции
+                _create_trophies_row(cursor, user_id)
                 current_trophies = []
             else:
                 trophies_str = row[0] or ''
@@ -1991,11 +2008,8 @@ def update_active_trophies(db_path: str, user_id: int, active_trophies_list: Lis
             # Проверяем существует ли запись
             cursor.execute('SELECT user_id FROM trophies WHERE user_id = ?', (user_id,))
             if cursor.fetchone() is None:
-                # Если записи нет, создаем её
-                user = get_user(db_path, user_id)
-                psn_id = user.get('psn_id', '') if user else ''
-                if not init_user_trophies(db_path, user_id, psn_id):
-                    return False
+                # Если записи нет, создаем её в той же транзакции
+                _create_trophies_row(cursor, user_id)
             
             # Обновляем активные трофеи
             active_trophies_str = join_comma_separated_list(valid_active)
@@ -2173,7 +2187,7 @@ def get_rotation_week_info(db_path: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def update_rotation_week(db_path: str) -> bool:
+def update_rotation_week(db_path: str) -> Optional[int]:
     """
     Обновляет неделю ротации (увеличивает на 1, после 16 → 1).
     
@@ -2181,12 +2195,12 @@ def update_rotation_week(db_path: str) -> bool:
         db_path: Путь к файлу базы данных
     
     Returns:
-        True при успешном обновлении, иначе False
+        Новый номер недели при успешном обновлении, иначе None
     """
     try:
         with db_connection(db_path, init_if_missing=True) as cursor:
             if cursor is None:
-                return False
+                return None
             
             # Получаем текущую неделю
             cursor.execute('SELECT week FROM rotation_current_week WHERE id = 1')
@@ -2199,7 +2213,7 @@ def update_rotation_week(db_path: str) -> bool:
                     INSERT INTO rotation_current_week (id, week, last_updated)
                     VALUES (1, 14, ?)
                 ''', (current_time,))
-                return True
+                return 14
             
             current_week = row[0]
             # Увеличиваем неделю на 1, после 16 → 1
@@ -2212,12 +2226,41 @@ def update_rotation_week(db_path: str) -> bool:
                 WHERE id = 1
             ''', (new_week, current_time))
             
-            return True
+            return new_week
             
     except sqlite3.Error as e:
         print(f"Ошибка обновления недели ротации: {e}")
         traceback.print_exc()
-        return False
+        return None
+
+
+def _build_hellmode_quest_from_row(row: tuple) -> Optional[Dict[str, Any]]:
+    """
+    Формирует словарь задания HellMode из результата SQL запроса.
+    
+    Args:
+        row: Кортеж (map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward)
+    
+    Returns:
+        Словарь с данными задания или None если задание пустое
+    """
+    map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward = row
+    
+    # Проверяем, что задание не пустое
+    if not map_slug or not emote_slug or not class_slug or not gear_slug:
+        return None
+    
+    return {
+        'map_slug': map_slug,
+        'map_name': map_name,
+        'emote_slug': emote_slug,
+        'emote_name': emote_name,
+        'class_slug': class_slug,
+        'class_name': class_name,
+        'gear_slug': gear_slug,
+        'gear_name': gear_name,
+        'reward': reward
+    }
 
 
 def get_current_hellmode_quest(db_path: str, quest_id: int = 1) -> Optional[Dict[str, Any]]:
@@ -2247,23 +2290,7 @@ def get_current_hellmode_quest(db_path: str, quest_id: int = 1) -> Optional[Dict
             if not row:
                 return None
             
-            map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward = row
-            
-            # Проверяем, что задание не пустое
-            if not map_slug or not emote_slug or not class_slug or not gear_slug:
-                return None
-            
-            return {
-                'map_slug': map_slug,
-                'map_name': map_name,
-                'emote_slug': emote_slug,
-                'emote_name': emote_name,
-                'class_slug': class_slug,
-                'class_name': class_name,
-                'gear_slug': gear_slug,
-                'gear_name': gear_name,
-                'reward': reward
-            }
+            return _build_hellmode_quest_from_row(row)
             
     except sqlite3.Error as e:
         print(f"Ошибка получения задания HellMode: {e}")
@@ -2271,6 +2298,46 @@ def get_current_hellmode_quest(db_path: str, quest_id: int = 1) -> Optional[Dict
         return None
 
 
+def get_hellmode_quests(db_path: str, quest_ids: tuple = (1, 2)) -> Dict[int, Dict[str, Any]]:
+    """
+    Получает несколько заданий HellMode одним запросом.
+    
+    Args:
+        db_path: Путь к файлу базы данных
+        quest_ids: ID заданий (1 - еженедельное, 2 - дополнительное)
+    
+    Returns:
+        Словарь {quest_id: задание}. Отсутствующие и пустые задания не включаются
+    """
+    if not quest_ids:
+        return {}
+    
+    try:
+        with db_connection(db_path) as cursor:
+            if cursor is None:
+                return {}
+            
+            placeholders = ','.join('?' for _ in quest_ids)
+            cursor.execute(f'''
+                SELECT id, map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward
+                FROM hellmode_quest
+                WHERE id IN ({placeholders})
+            ''', tuple(quest_ids))
+            
+            quests = {}
+            for row in cursor.fetchall():
+                quest = _build_hellmode_quest_from_row(row[1:])
+                if quest:
+                    quests[row[0]] = quest
+            
+            return quests
+            
+    except sqlite3.Error as e:
+        print(f"Ошибка получения заданий HellMode: {e}")
+        traceback.print_exc()
+        return {}
+
+
 def get_additional_hellmode_quest(db_path: str) -> Optional[Dict[str, Any]]:
     """
     Получает дополнительное задание HellMode из базы данных.
@@ -2296,7 +2363,7 @@ def update_hellmode_quest(
     gear_name: str,
     reward: int,
     quest_id: int = 1
-) -> bool:
+) -> int:
     """
     Обновляет задание HellMode в базе данных по ID.
     
@@ -2314,7 +2381,7 @@ def update_hellmode_quest(
         quest_id: ID задания (1 - еженедельное, 2 - дополнительное)
     
     Returns:
-        True если обновление успешно, иначе False
+        Количество сохраненных записей: 1 если сохранение успешно, иначе 0
     """
     conn = None
     cursor = None
@@ -2322,46 +2389,42 @@ def update_hellmode_quest(
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Обновляем запись по ID
+        # Создаем запись или обновляем существующую по ID
         cursor.execute('''
-            UPDATE hellmode_quest
-            SET map_slug = ?, map_name = ?, 
-                emote_slug = ?, emote_name = ?,
-                class_slug = ?, class_name = ?,
-                gear_slug = ?, gear_name = ?,
-                reward = ?
-            WHERE id = ?
-        ''', (map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward, quest_id))
+            INSERT INTO hellmode_quest (
+                id, map_slug, map_name, 
+                emote_slug, emote_name,
+                class_slug, class_name,
+                gear_slug, gear_name,
+                reward
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                map_slug = excluded.map_slug, map_name = excluded.map_name,
+                emote_slug = excluded.emote_slug, emote_name = excluded.emote_name,
+                class_slug = excluded.class_slug, class_name = excluded.class_name,
+                gear_slug = excluded.gear_slug, gear_name = excluded.gear_name,
+                reward = excluded.reward
+        ''', (quest_id, map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward))
         
-        # Если запись не была обновлена (не существует), создаем новую
-        if cursor.rowcount == 0:
-            cursor.execute('''
-                INSERT INTO hellmode_quest (
-                    id, map_slug, map_name, 
-                    emote_slug, emote_name,
-                    class_slug, class_name,
-                    gear_slug, gear_name,
-                    reward
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (quest_id, map_slug, map_name, emote_slug, emote_name, class_slug, class_name, gear_slug, gear_name, reward))
+        saved_count = cursor.rowcount
         
         # Явно коммитим транзакцию
         conn.commit()
-        return True
+        return saved_count
             
     except sqlite3.Error as e:
         if conn:
             conn.rollback()
         print(f"Ошибка обновления задания HellMode: {e}")
         traceback.print_exc()
-        return False
+        return 0
     except Exception as e:
         if conn:
             conn.rollback()
         print(f"Неожиданная ошибка при обновлении задания HellMode: {e}")
         traceback.print_exc()
-        return False
+        return 0
     finally:
         if cursor:
             cursor.close()
@@ -2454,29 +2517,13 @@ def mark_quest_done(db_path: str, user_id: int, psn_id: str, quest_type: str) ->
                 if cursor is None:
                     return False
                 
-                # Получаем текущее состояние
+                # Создаем запись только с additional_hellmode или отмечаем его в существующей
                 cursor.execute('''
-                    SELECT additional_hellmode, psn_id
-                    FROM quests_done
-                    WHERE user_id = ?
-                ''', (user_id,))
-                row = cursor.fetchone()
-                
-                if row:
-                    additional_hellmode, existing_psn_id = row
-                    # Обновляем только additional_hellmode
-                    cursor.execute('''
-                        UPDATE quests_done
-                        SET additional_hellmode = 1
-                        WHERE user_id = ?
-                    ''', (user_id,))
-                else:
-                    # Создаем новую запись только с additional_hellmode
-                    cursor.execute('''
-                        INSERT INTO quests_done 
-                        (user_id, psn_id, hellmode, story, survival, trials, all_completed, first_completed_at, additional_hellmode)
-                        VALUES (?, ?, 0, 0, 0, 0, 0, NULL, 1)
-                    ''', (user_id, psn_id))
+                    INSERT INTO quests_done 
+                    (user_id, psn_id, hellmode, story, survival, trials, all_completed, first_completed_at, additional_hellmode)
+                    VALUES (?, ?, 0, 0, 0, 0, 0, NULL, 1)
+                    ON CONFLICT(user_id) DO UPDATE SET additional_hellmode = 1
+                ''', (user_id, psn_id))
                 
                 return True
                 
@@ -2617,47 +2664,39 @@ def reset_weekly_quests(db_path: str) -> bool:
             ''')
             rows = cursor.fetchall()
             
+            # Раскладываем пользователей по спискам и применяем изменения пакетно
+            reset_ids = []
+            delete_ids = []
             for row in rows:
                 user_id, hellmode, story, survival, trials, all_completed, additional_hellmode = row
-                if additional_hellmode is None:
-                    additional_hellmode = 0
                 
                 # Считаем количество выполненных заданий
                 completed_count = hellmode + story + survival + trials
                 
-                if all_completed > 0:
+                if all_completed > 0 and completed_count == 4:
                     # Если все 4 задания выполнены - сбросить только задания, сохранить all_completed
-                    # Также сбрасываем additional_hellmode
-                    if completed_count == 4:
-                        cursor.execute('''
-                            UPDATE quests_done
-                            SET hellmode = 0, story = 0, survival = 0, trials = 0, additional_hellmode = 0
-                            WHERE user_id = ?
-                        ''', (user_id,))
-                    else:
-                        # Если не все задания выполнены - сбросить прогресс и удалить запись
-                        # Сначала явно сбрасываем additional_hellmode перед удалением
-                        cursor.execute('''
-                            UPDATE quests_done
-                            SET additional_hellmode = 0
-                            WHERE user_id = ?
-                        ''', (user_id,))
-                        cursor.execute('''
-                            DELETE FROM quests_done
-                            WHERE user_id = ?
-                        ''', (user_id,))
+                    reset_ids.append((user_id,))
                 else:
-                    # Если all_completed = 0 - удалить запись
-                    # Сначала явно сбрасываем additional_hellmode перед удалением
-                    cursor.execute('''
-                        UPDATE quests_done
-                        SET additional_hellmode = 0
-                        WHERE user_id = ?
-                    ''', (user_id,))
-                    cursor.execute('''
-                        DELETE FROM quests_done
-                        WHERE user_id = ?
-                    ''', (user_id,))
+                    # Иначе (не все задания или all_completed = 0) - удалить запись
+                    delete_ids.append((user_id,))
+            
+            # Сбрасываем задания вместе с additional_hellmode, all_completed сохраняется
+            cursor.executemany('''
+                UPDATE quests_done
+                SET hellmode = 0, story = 0, survival = 0, trials = 0, additional_hellmode = 0
+                WHERE user_id = ?
+            ''', reset_ids)
+            
+            # Сначала явно сбрасываем additional_hellmode перед удалением
+            cursor.executemany('''
+                UPDATE quests_done
+                SET additional_hellmode = 0
+                WHERE user_id = ?
+            ''', delete_ids)
+            cursor.executemany('''
+                DELETE FROM quests_done
+                WHERE user_id = ?
+            ''', delete_ids)
             
             return True
             
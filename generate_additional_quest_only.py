@@ -6,25 +6,33 @@ import os
 import sys
 import json
 import random
+from functools import lru_cache
 from typing import Optional
+from dotenv import load_dotenv
 
 # Добавляем путь к модулю db
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from db import get_current_hellmode_quest, update_hellmode_quest, get_additional_hellmode_quest
+from db import update_hellmode_quest, get_hellmode_quests
 
-# Пытаемся загрузить из .env вручную
-DB_PATH = "/root/miniapp_api/app.db"
-if os.path.exists("/root/miniapp_api/.env"):
-    with open("/root/miniapp_api/.env", "r") as f:
-        for line in f:
-            if line.startswith("DB_PATH="):
-                DB_PATH = line.split("=", 1)[1].strip().strip('"').strip("'")
-                break
+# Загружаем переменные окружения
+load_dotenv("/root/miniapp_api/.env")
+
+DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 
 QUESTS_JSON_PATH = "/root/tsushimaru_app/docs/assets/data/quests.json"
-MAX_ATTEMPTS = 10
 BASE_REWARD = 350  # Базовая награда за задание
+QUEST_SLUG_FIELDS = ('map_slug', 'emote_slug', 'class_slug', 'gear_slug')
+
+
+@lru_cache(maxsize=4)
+def _read_quests_json(mtime_ns: int) -> dict:
+    """
+    Читает и парсит quests.json. Кешируется по времени изменения файла,
+    поэтому повторные вызовы не перечитывают неизмененный файл.
+    """
+    with open(QUESTS_JSON_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 def load_quests_config() -> dict:
@@ -34,8 +42,7 @@ def load_quests_config() -> dict:
     if not os.path.exists(QUESTS_JSON_PATH):
         raise FileNotFoundError(f"Файл конфигурации не найден: {QUESTS_JSON_PATH}")
     
-    with open(QUESTS_JSON_PATH, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    config = _read_quests_json(os.stat(QUESTS_JSON_PATH).st_mtime_ns)
     
     if 'hellmode' not in config:
         raise KeyError("Отсутствует секция 'hellmode' в конфигурации")
@@ -50,14 +57,38 @@ def load_quests_config() -> dict:
     return hellmode
 
 
-def generate_random_quest(hellmode_config: dict) -> dict:
+def collect_used_slugs(*quests: Optional[dict]) -> dict:
+    """
+    Собирает slug'и, уже занятые в переданных заданиях.
+    """
+    used = {field: set() for field in QUEST_SLUG_FIELDS}
+    for quest in quests:
+        if not quest:
+            continue
+        for field in QUEST_SLUG_FIELDS:
+            used[field].add(quest[field])
+    return used
+
+
+def _choose_item(items: list, excluded_slugs) -> dict:
     """
-    Генерирует случайное задание из конфигурации.
+    Выбирает случайный элемент, не входящий в excluded_slugs.
+    Если свободных элементов нет, выбирает из полного списка.
     """
-    map_item = random.choice(hellmode_config['map'])
-    emote_item = random.choice(hellmode_config['emote'])
-    class_item = random.choice(hellmode_config['class'])
-    gear_item = random.choice(hellmode_config['gear'])
+    pool = [item for item in items if item['slug'] not in excluded_slugs]
+    return random.choice(pool or items)
+
+
+def generate_random_quest(hellmode_config: dict, excluded: Optional[dict] = None) -> dict:
+    """
+    Генерирует случайное задание из конфигурации, не выбирая занятые slug'и из excluded.
+    """
+    excluded = excluded or {}
+    
+    map_item = _choose_item(hellmode_config['map'], excluded.get('map_slug', ()))
+    emote_item = _choose_item(hellmode_config['emote'], excluded.get('emote_slug', ()))
+    class_item = _choose_item(hellmode_config['class'], excluded.get('class_slug', ()))
+    gear_item = _choose_item(hellmode_config['gear'], excluded.get('gear_slug', ()))
     
     map_slug = map_item['slug']
     map_name = map_item['name']
@@ -87,24 +118,11 @@ def generate_random_quest(hellmode_config: dict) -> dict:
     }
 
 
-def has_duplicates(new_quest: dict, *current_quests: Optional[dict]) -> bool:
+def has_duplicates(new_quest: dict, used_slugs: dict) -> bool:
     """
-    Проверяет, есть ли повторения между новым заданием и текущими заданиями.
+    Проверяет, есть ли повторения между новым заданием и занятыми slug'ами.
     """
-    if not current_quests:
-        return False
-    
-    fields_to_check = ['map_slug', 'emote_slug', 'class_slug', 'gear_slug']
-    
-    for current_quest in current_quests:
-        if not current_quest:
-            continue
-        
-        for field in fields_to_check:
-            if new_quest[field] == current_quest[field]:
-                return True
-    
-    return False
+    return any(new_quest[field] in used_slugs.get(field, ()) for field in QUEST_SLUG_FIELDS)
 
 
 def main():
@@ -117,8 +135,9 @@ def main():
         print("Конфигурация успешно загружена.")
         
         # Получаем текущие задания (НЕ изменяем еженедельное!)
-        current_weekly_quest = get_current_hellmode_quest(DB_PATH, quest_id=1)
-        current_additional_quest = get_additional_hellmode_quest(DB_PATH)
+        current_quests = get_hellmode_quests(DB_PATH, (1, 2))
+        current_weekly_quest = current_quests.get(1)
+        current_additional_quest = current_quests.get(2)
         
         if current_weekly_quest:
             print(f"\nТекущее еженедельное задание (НЕ ИЗМЕНЯЕТСЯ):")
@@ -140,26 +159,14 @@ def main():
         else:
             print("\nТекущее дополнительное задание отсутствует (будет создано новое).")
         
-        # Генерируем ТОЛЬКО дополнительное задание с проверкой на повторения
+        # Генерируем ТОЛЬКО дополнительное задание без повторений с текущими заданиями
         print("\nГенерация дополнительного задания...")
-        new_additional_quest = None
-        
-        for attempt in range(1, MAX_ATTEMPTS + 1):
-            generated = generate_random_quest(hellmode_config)
-            
-            # Проверяем, что оно не совпадает с еженедельным и текущим дополнительным
-            if not has_duplicates(generated, current_weekly_quest, current_additional_quest):
-                new_additional_quest = generated
-                print(f"Дополнительное задание сгенерировано с попытки {attempt}.")
-                break
-            else:
-                print(f"Попытка {attempt}: обнаружены повторения, перерандомивание...")
+        excluded = collect_used_slugs(current_weekly_quest, current_additional_quest)
+        new_additional_quest = generate_random_quest(hellmode_config, excluded)
         
-        # Если после всех попыток есть повторения - принимаем последний результат
-        if not new_additional_quest:
-            print(f"Внимание: после {MAX_ATTEMPTS} попыток все еще есть повторения.")
-            print("Принимается последний сгенерированный вариант.")
-            new_additional_quest = generate_random_quest(hellmode_config)
+        if has_duplicates(new_additional_quest, excluded):
+            print("Внимание: не хватает вариантов, часть полей повторяет текущие задания.")
+        print("Дополнительное задание сгенерировано.")
         
         print(f"\nНовое дополнительное задание:")
         print(f"  Карта: {new_additional_quest['map_name']} ({new_additional_quest['map_slug']})")
@@ -12,6 +12,51 @@ from fastapi import UploadFile
 from PIL import Image, ImageOps
 
 
+def _flatten_to_rgb(image: Image.Image) -> Image.Image:
+    """
+    Приводит изображение RGBA/LA/P к RGB, подкладывая белый фон под прозрачность.
+    
+    Палитровые изображения без прозрачности и изображения с полностью
+    непрозрачным альфа-каналом конвертируются сразу в RGB, без наложения на фон.
+    
+    Args:
+        image: PIL Image объект
+    
+    Returns:
+        Изображение в режиме RGB (или исходное, если конвертация не нужна)
+    """
+    if image.mode not in ('RGBA', 'LA', 'P'):
+        return image
+    
+    if image.mode == 'P':
+        if 'transparency' not in image.info:
+            return image.convert('RGB')
+        image = image.convert('RGBA')
+    
+    # Полностью непрозрачный альфа-канал можно просто отбросить
+    if image.mode in ('RGBA', 'LA') and image.getextrema()[-1][0] == 255:
+        return image.convert('RGB')
+    
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+    return background
+
+
+def _save_jpeg(image: Image.Image, output_path: str, quality: int) -> None:
+    """
+    Сохраняет изображение как прогрессивный JPEG.
+    
+    Прогрессивная развертка с оптимизированными таблицами Хаффмана дает
+    файлы меньшего размера при том же качестве.
+    
+    Args:
+        image: PIL Image объект в режиме RGB/L
+        output_path: Путь для сохранения
+        quality: Качество JPEG
+    """
+    image.save(output_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+
+
 def process_image_for_upload(image: Image.Image, output_path: str, quality: int = 85) -> None:
     """
     Универсальная обработка изображений для загрузки.
@@ -30,15 +75,10 @@ def process_image_for_upload(image: Image.Image, output_path: str, quality: int
     image = ImageOps.exif_transpose(image)
     
     # Конвертируем в RGB если нужно (PNG с альфа-каналом)
-    if image.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        if image.mode == 'P':
-            image = image.convert('RGBA')
-        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-        image = background
+    image = _flatten_to_rgb(image)
     
     # Сохраняем как JPEG
-    image.save(output_path, 'JPEG', quality=quality, optimize=True)
+    _save_jpeg(image, output_path, quality)
 
 
 def process_avatar_image(image: Image.Image, output_path: str, size: int = 300) -> None:
@@ -73,15 +113,10 @@ def process_avatar_image(image: Image.Image, output_path: str, size: int = 300)
     image = image.resize((size, size), Image.Resampling.LANCZOS)
     
     # Конвертируем в RGB если нужно
-    if image.mode in ('RGBA', 'LA', 'P'):
-        background = Image.new('RGB', image.size, (255, 255, 255))
-        if image.mode == 'P':
-            image = image.convert('RGBA')
-        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-        image = background
+    image = _flatten_to_rgb(image)
     
     # Сохраняем как JPEG
-    image.save(output_path, 'JPEG', quality=85, optimize=True)
+    _save_jpeg(image, output_path, 85)
 
 
 def validate_image_file(file: UploadFile) -> bool:
@@ -6,25 +6,36 @@ import os
 import sys
 import json
 import random
-from datetime import datetime, timezone, timedelta
+import time
+from functools import lru_cache
+from datetime import date, datetime, timezone, timedelta
 from typing import Optional
+from dotenv import load_dotenv
 
 # Добавляем путь к модулю db
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from db import get_current_hellmode_quest, update_hellmode_quest, get_additional_hellmode_quest
+from db import get_current_hellmode_quest, update_hellmode_quest, get_additional_hellmode_quest, get_hellmode_quests
 
-# Пытаемся загрузить из .env вручную
-DB_PATH = "/root/miniapp_api/app.db"
-if os.path.exists("/root/miniapp_api/.env"):
-    with open("/root/miniapp_api/.env", "r") as f:
-        for line in f:
-            if line.startswith("DB_PATH="):
-                DB_PATH = line.split("=", 1)[1].strip().strip('"').strip("'")
-                break
+# Загружаем переменные окружения
+load_dotenv("/root/miniapp_api/.env")
+
+DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 QUESTS_JSON_PATH = "/root/tsushimaru_app/docs/assets/data/quests.json"
-MAX_ATTEMPTS = 10
+# Файл-метка с timestamp последней успешной генерации
+QUEST_STAMP_PATH = "/var/run/quest_generator.stamp"
 BASE_REWARD = 350  # Базовая награда за задание
+QUEST_SLUG_FIELDS = ('map_slug', 'emote_slug', 'class_slug', 'gear_slug')
+
+
+@lru_cache(maxsize=4)
+def _read_quests_json(mtime_ns: int) -> dict:
+    """
+    Читает и парсит quests.json. Кешируется по времени изменения файла,
+    поэтому повторные вызовы не перечитывают неизмененный файл.
+    """
+    with open(QUESTS_JSON_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 def load_quests_config() -> dict:
@@ -42,8 +53,7 @@ def load_quests_config() -> dict:
     if not os.path.exists(QUESTS_JSON_PATH):
         raise FileNotFoundError(f"Файл конфигурации не найден: {QUESTS_JSON_PATH}")
     
-    with open(QUESTS_JSON_PATH, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+    config = _read_quests_json(os.stat(QUESTS_JSON_PATH).st_mtime_ns)
     
     # Проверяем наличие необходимых полей
     if 'hellmode' not in config:
@@ -59,21 +69,52 @@ def load_quests_config() -> dict:
     return hellmode
 
 
-def generate_random_quest(hellmode_config: dict) -> dict:
+def collect_used_slugs(*quests: Optional[dict]) -> dict:
+    """
+    Собирает slug'и, уже занятые в переданных заданиях.
+    
+    Args:
+        *quests: Задания (None игнорируются)
+    
+    Returns:
+        Словарь {поле slug: множество занятых значений}
+    """
+    used = {field: set() for field in QUEST_SLUG_FIELDS}
+    for quest in quests:
+        if not quest:
+            continue
+        for field in QUEST_SLUG_FIELDS:
+            used[field].add(quest[field])
+    return used
+
+
+def _choose_item(items: list, excluded_slugs) -> dict:
+    """
+    Выбирает случайный элемент, не входящий в excluded_slugs.
+    Если свободных элементов нет, выбирает из полного списка.
+    """
+    pool = [item for item in items if item['slug'] not in excluded_slugs]
+    return random.choice(pool or items)
+
+
+def generate_random_quest(hellmode_config: dict, excluded: Optional[dict] = None) -> dict:
     """
     Генерирует случайное задание из конфигурации.
     
     Args:
         hellmode_config: Конфигурация заданий HellMode
+        excluded: Занятые slug'и по полям (см. collect_used_slugs), которые не нужно выбирать
     
     Returns:
         Словарь с полями: map_slug, emote_slug, class_slug, gear_slug, reward
     """
-    # Выбираем случайные элементы
-    map_item = random.choice(hellmode_config['map'])
-    emote_item = random.choice(hellmode_config['emote'])
-    class_item = random.choice(hellmode_config['class'])
-    gear_item = random.choice(hellmode_config['gear'])
+    excluded = excluded or {}
+    
+    # Выбираем случайные элементы сразу без повторений
+    map_item = _choose_item(hellmode_config['map'], excluded.get('map_slug', ()))
+    emote_item = _choose_item(hellmode_config['emote'], excluded.get('emote_slug', ()))
+    class_item = _choose_item(hellmode_config['class'], excluded.get('class_slug', ()))
+    gear_item = _choose_item(hellmode_config['gear'], excluded.get('gear_slug', ()))
     
     # Извлекаем slug'и и названия
     map_slug = map_item['slug']
@@ -105,33 +146,46 @@ def generate_random_quest(hellmode_config: dict) -> dict:
     }
 
 
-def has_duplicates(new_quest: dict, *current_quests: Optional[dict]) -> bool:
+def has_duplicates(new_quest: dict, used_slugs: dict) -> bool:
     """
-    Проверяет, есть ли повторения между новым заданием и текущими заданиями.
+    Проверяет, есть ли повторения между новым заданием и занятыми slug'ами.
     
     Args:
         new_quest: Новое задание
-        *current_quests: Текущие задания (может быть несколько, None игнорируются)
+        used_slugs: Занятые slug'и по полям (см. collect_used_slugs)
     
     Returns:
         True если есть повторения, иначе False
     """
-    if not current_quests:
-        return False
-    
-    # Проверяем каждое поле (кроме reward)
-    fields_to_check = ['map_slug', 'emote_slug', 'class_slug', 'gear_slug']
+    return any(new_quest[field] in used_slugs.get(field, ()) for field in QUEST_SLUG_FIELDS)
+
+
+def get_last_generation_date() -> Optional[date]:
+    """
+    Возвращает дату (по МСК) последней успешной генерации из файла-метки.
     
-    for current_quest in current_quests:
-        if not current_quest:
-            continue
-        
-        for field in fields_to_check:
-            # Поля в БД теперь имеют те же названия
-            if new_quest[field] == current_quest[field]:
-                return True
+    Returns:
+        Дата последней генерации или None, если метки нет или она повреждена
+    """
+    try:
+        with open(QUEST_STAMP_PATH, 'r') as f:
+            timestamp = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
     
-    return False
+    moscow_tz = timezone(timedelta(hours=3))
+    return datetime.fromtimestamp(timestamp, tz=moscow_tz).date()
+
+
+def save_generation_stamp() -> None:
+    """
+    Записывает timestamp успешной генерации в файл-метку.
+    """
+    try:
+        with open(QUEST_STAMP_PATH, 'w') as f:
+            f.write(str(int(time.time())))
+    except OSError as e:
+        print(f"Не удалось записать метку генерации {QUEST_STAMP_PATH}: {e}")
 
 
 def should_generate_quest() -> bool:
@@ -157,9 +211,14 @@ def should_generate_quest() -> bool:
     if now_moscow.hour < 9:
         return False
     
+    # Если сегодня генерация уже прошла успешно - БД не трогаем
+    if get_last_generation_date() == now_moscow.date():
+        return False
+    
     # Получаем текущие задания из БД
-    current_weekly_quest = get_current_hellmode_quest(DB_PATH, quest_id=1)
-    current_additional_quest = get_current_hellmode_quest(DB_PATH, quest_id=2)
+    current_quests = get_hellmode_quests(DB_PATH, (1, 2))
+    current_weekly_quest = current_quests.get(1)
+    current_additional_quest = current_quests.get(2)
     
     # Если хотя бы одно задание отсутствует или пустое - генерируем
     if not current_weekly_quest or not current_additional_quest:
@@ -174,15 +233,27 @@ def should_generate_quest() -> bool:
 def main():
     """
     Главная функция скрипта.
+    
+    С флагом --verify после сохранения задания перечитываются из БД для проверки.
+    С флагом --scheduled генерация выполняется только если этого требует should_generate_quest()
+    (суббота после 9:00 МСК и сегодня генерации ещё не было).
     """
+    verify_save = '--verify' in sys.argv[1:]
+    scheduled = '--scheduled' in sys.argv[1:]
+    
+    if scheduled and not should_generate_quest():
+        print("Генерация задания не требуется (не время по расписанию или уже выполнена сегодня).")
+        return
+    
     try:
         print("Загрузка конфигурации заданий...")
         hellmode_config = load_quests_config()
         print("Конфигурация успешно загружена.")
         
         # Получаем текущие задания
-        current_weekly_quest = get_current_hellmode_quest(DB_PATH, quest_id=1)
-        current_additional_quest = get_additional_hellmode_quest(DB_PATH)
+        current_quests = get_hellmode_quests(DB_PATH, (1, 2))
+        current_weekly_quest = current_quests.get(1)
+        current_additional_quest = current_quests.get(2)
         
         if current_weekly_quest:
             print(f"Текущее еженедельное задание:")
@@ -212,46 +283,23 @@ def main():
         else:
             print("\nТекущее дополнительное задание отсутствует (будет создано новое).")
         
-        # Генерируем еженедельное задание с проверкой на повторения
+        # Генерируем еженедельное задание без повторений с текущими заданиями
         print("\nГенерация еженедельного задания...")
-        new_weekly_quest = None
+        excluded = collect_used_slugs(current_weekly_quest, current_additional_quest)
+        new_weekly_quest = generate_random_quest(hellmode_config, excluded)
         
-        for attempt in range(1, MAX_ATTEMPTS + 1):
-            generated = generate_random_quest(hellmode_config)
-            
-            if not has_duplicates(generated, current_weekly_quest, current_additional_quest):
-                new_weekly_quest = generated
-                print(f"Еженедельное задание сгенерировано с попытки {attempt}.")
-                break
-            else:
-                print(f"Попытка {attempt}: обнаружены повторения, перерандомивание...")
-        
-        # Если после всех попыток есть повторения - принимаем последний результат
-        if not new_weekly_quest:
-            print(f"Внимание: после {MAX_ATTEMPTS} попыток все еще есть повторения.")
-            print("Принимается последний сгенерированный вариант.")
-            new_weekly_quest = generate_random_quest(hellmode_config)
+        if has_duplicates(new_weekly_quest, excluded):
+            print("Внимание: не хватает вариантов, часть полей повторяет текущие задания.")
+        print("Еженедельное задание сгенерировано.")
         
-        # Генерируем дополнительное задание с проверкой на повторения
+        # Генерируем дополнительное задание без повторений с еженедельным и текущими заданиями
         print("\nГенерация дополнительного задания...")
-        new_additional_quest = None
+        excluded = collect_used_slugs(new_weekly_quest, current_weekly_quest, current_additional_quest)
+        new_additional_quest = generate_random_quest(hellmode_config, excluded)
         
-        for attempt in range(1, MAX_ATTEMPTS + 1):
-            generated = generate_random_quest(hellmode_config)
-            
-            # Проверяем, что оно не совпадает с еженедельным и текущими заданиями
-            if not has_duplicates(generated, new_weekly_quest, current_weekly_quest, current_additional_quest):
-                new_additional_quest = generated
-                print(f"Дополнительное задание сгенерировано с попытки {attempt}.")
-                break
-            else:
-                print(f"Попытка {attempt}: обнаружены повторения, перерандомивание...")
-        
-        # Если после всех попыток есть повторения - принимаем последний результат
-        if not new_additional_quest:
-            print(f"Внимание: после {MAX_ATTEMPTS} попыток все еще есть повторения.")
-            print("Принимается последний сгенерированный вариант.")
-            new_additional_quest = generate_random_quest(hellmode_config)
+        if has_duplicates(new_additional_quest, excluded):
+            print("Внимание: не хватает вариантов, часть полей повторяет другие задания.")
+        print("Дополнительное задание сгенерировано.")
         
         print(f"\nНовое еженедельное задание:")
         print(f"  Карта: {new_weekly_quest['map_name']} ({new_weekly_quest['map_slug']})")
@@ -283,15 +331,16 @@ def main():
                 new_weekly_quest['reward'],
                 quest_id=1
             )
-            if result:
+            if result == 1:
                 print("Еженедельное задание успешно сохранено!")
-                # Проверяем, что данные действительно сохранились
-                saved_quest = get_current_hellmode_quest(DB_PATH, quest_id=1)
-                if saved_quest and saved_quest.get('map_slug') == new_weekly_quest['map_slug']:
-                    print("✓ Проверка: еженедельное задание подтверждено в БД")
-                else:
-                    print("⚠ ВНИМАНИЕ: задание не найдено в БД после сохранения!")
-                    sys.exit(1)
+                if verify_save:
+                    # Проверяем, что данные действительно сохранились
+                    saved_quest = get_current_hellmode_quest(DB_PATH, quest_id=1)
+                    if saved_quest and saved_quest.get('map_slug') == new_weekly_quest['map_slug']:
+                        print("✓ Проверка: еженедельное задание подтверждено в БД")
+                    else:
+                        print("⚠ ВНИМАНИЕ: задание не найдено в БД после сохранения!")
+                        sys.exit(1)
             else:
                 print("Ошибка: не удалось сохранить еженедельное задание в базу данных")
                 sys.exit(1)
@@ -317,15 +366,16 @@ def main():
                 new_additional_quest['reward'],
                 quest_id=2
             )
-            if result:
+            if result == 1:
                 print("Дополнительное задание успешно сохранено!")
-                # Проверяем, что данные действительно сохранились
-                saved_quest = get_additional_hellmode_quest(DB_PATH)
-                if saved_quest and saved_quest.get('map_slug') == new_additional_quest['map_slug']:
-                    print("✓ Проверка: дополнительное задание подтверждено в БД")
-                else:
-                    print("⚠ ВНИМАНИЕ: задание не найдено в БД после сохранения!")
-                    sys.exit(1)
+                if verify_save:
+                    # Проверяем, что данные действительно сохранились
+                    saved_quest = get_additional_hellmode_quest(DB_PATH)
+                    if saved_quest and saved_quest.get('map_slug') == new_additional_quest['map_slug']:
+                        print("✓ Проверка: дополнительное задание подтверждено в БД")
+                    else:
+                        print("⚠ ВНИМАНИЕ: задание не найдено в БД после сохранения!")
+                        sys.exit(1)
             else:
                 print("Ошибка: не удалось сохранить дополнительное задание в базу данных")
                 sys.exit(1)
@@ -334,6 +384,8 @@ def main():
             import traceback
             traceback.print_exc()
             sys.exit(1)
+        
+        save_generation_stamp()
     
     except FileNotFoundError as e:
         print(f"Ошибка: {e}")
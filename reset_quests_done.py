@@ -2,9 +2,11 @@
 # reset_quests_done.py
 # Скрипт для автоматического сброса выполненных заданий каждую субботу в 9:00 МСК
 
+import calendar
 import os
+import sqlite3
 import sys
-from datetime import datetime, timezone, timedelta
+import time
 from dotenv import load_dotenv
 
 # Добавляем путь к модулю db
@@ -13,36 +15,58 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from db import reset_weekly_quests
 from typing import Optional
 
-# Загружаем переменные окружения
-load_dotenv()
+# Загружаем переменные окружения из .env, только если окружение их еще не задало
+# (например, DB_PATH передан из crontab или родительского процесса)
+if not os.environ.get("DB_PATH"):
+    load_dotenv()
 
 DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 
-# Для отслеживания времени последнего сброса создадим отдельную таблицу
-def get_last_reset_time(db_path: str) -> Optional[float]:
+# Смещение московского времени относительно UTC (в секундах)
+MOSCOW_OFFSET = 3 * 3600
+
+# Для отслеживания времени последнего сброса используется отдельная таблица
+_CREATE_RESET_LOG_SQL = '''
+    CREATE TABLE IF NOT EXISTS quests_reset_log (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_reset_timestamp INTEGER
+    )
+'''
+_SELECT_LAST_RESET_SQL = 'SELECT last_reset_timestamp FROM quests_reset_log WHERE id = 1'
+_UPSERT_LAST_RESET_SQL = '''
+    INSERT INTO quests_reset_log (id, last_reset_timestamp)
+    VALUES (1, ?)
+    ON CONFLICT(id) DO UPDATE SET last_reset_timestamp = excluded.last_reset_timestamp
+'''
+
+
+def _create_reset_log_table(conn: sqlite3.Connection) -> None:
+    """
+    Создает таблицу quests_reset_log, если ее еще нет.
+    """
+    conn.execute(_CREATE_RESET_LOG_SQL)
+
+
+def get_last_reset_time(conn: sqlite3.Connection) -> Optional[float]:
     """
     Получает timestamp последнего сброса заданий.
     
+    DDL выполняется только при первом запуске, когда таблицы еще нет.
+    
+    Args:
+        conn: Открытое подключение к БД
+    
     Returns:
         Timestamp последнего сброса или None
     """
     try:
-        import sqlite3
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Создаем таблицу если не существует
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS quests_reset_log (
-                id INTEGER PRIMARY KEY CHECK (id = 1),
-                last_reset_timestamp INTEGER
-            )
-        ''')
-        
-        cursor.execute('SELECT last_reset_timestamp FROM quests_reset_log WHERE id = 1')
-        row = cursor.fetchone()
-        
-        conn.close()
+        try:
+            row = conn.execute(_SELECT_LAST_RESET_SQL).fetchone()
+        except sqlite3.OperationalError as e:
+            if 'no such table' not in str(e):
+                raise
+            _create_reset_log_table(conn)
+            return None
         
         if row:
             return float(row[0])
@@ -53,25 +77,20 @@ def get_last_reset_time(db_path: str) -> Optional[float]:
         return None
 
 
-def set_last_reset_time(db_path: str, timestamp: float) -> bool:
+def set_last_reset_time(conn: sqlite3.Connection, timestamp: float) -> bool:
     """
     Устанавливает timestamp последнего сброса заданий.
     
+    Args:
+        conn: Открытое подключение к БД
+        timestamp: Время сброса (Unix timestamp)
+    
     Returns:
         True если успешно, иначе False
     """
     try:
-        import sqlite3
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO quests_reset_log (id, last_reset_timestamp)
-            VALUES (1, ?)
-        ''', (int(timestamp),))
-        
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(_UPSERT_LAST_RESET_SQL, (int(timestamp),))
         return True
         
     except Exception as e:
@@ -79,44 +98,43 @@ def set_last_reset_time(db_path: str, timestamp: float) -> bool:
         return False
 
 
-def should_reset_quests() -> bool:
+def should_reset_quests(conn: sqlite3.Connection) -> bool:
     """
     Проверяет, нужно ли сбрасывать задания.
     Сброс происходит каждую субботу в 9:00 МСК (UTC+3).
     
+    Args:
+        conn: Открытое подключение к БД
+    
     Returns:
         True если нужно сбросить задания, иначе False
     """
-    # Текущее время в UTC
-    now_utc = datetime.now(timezone.utc)
-    
-    # Московское время (UTC+3)
-    moscow_tz = timezone(timedelta(hours=3))
-    now_moscow = now_utc.astimezone(moscow_tz)
+    # Текущее время и московское время (UTC+3) без создания datetime-объектов
+    now_ts = int(time.time())
+    moscow_struct = time.gmtime(now_ts + MOSCOW_OFFSET)
     
-    # Проверяем, что сегодня суббота (weekday() = 5)
-    if now_moscow.weekday() != 5:  # 5 = суббота
+    # Проверяем, что сегодня суббота (tm_wday = 5)
+    if moscow_struct.tm_wday != 5:  # 5 = суббота
         return False
     
     # Проверяем, что время 9:00 или позже
-    if now_moscow.hour < 9:
+    if moscow_struct.tm_hour < 9:
         return False
     
     # Получаем последнее время сброса из БД
-    last_reset_timestamp = get_last_reset_time(DB_PATH)
+    last_reset_timestamp = get_last_reset_time(conn)
     if last_reset_timestamp is None:
         # Если не удалось получить информацию, все равно проверяем время
         # Если сейчас суббота 9:00 или позже, разрешаем сброс
         return True
     
-    last_reset = datetime.fromtimestamp(last_reset_timestamp, tz=timezone.utc)
-    last_reset_moscow = last_reset.astimezone(moscow_tz)
-    
     # Проверяем, что с последнего сброса прошла хотя бы одна суббота 9:00
     # Если последнее обновление было раньше сегодняшней субботы 9:00, сбрасываем
-    saturday_09 = now_moscow.replace(hour=9, minute=0, second=0, microsecond=0)
+    saturday_09_ts = calendar.timegm((
+        moscow_struct.tm_year, moscow_struct.tm_mon, moscow_struct.tm_mday, 9, 0, 0, 0, 0, 0
+    )) - MOSCOW_OFFSET
     
-    if last_reset_moscow < saturday_09:
+    if last_reset_timestamp < saturday_09_ts:
         return True
     
     return False
@@ -126,14 +144,19 @@ def main():
     """
     Главная функция скрипта.
     """
+    conn = None
     try:
+        # Одно подключение на весь запуск: чтение и запись времени сброса
+        conn = sqlite3.connect(DB_PATH)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        
         # Проверяем, нужно ли сбрасывать
-        if should_reset_quests():
+        if should_reset_quests(conn):
             print("Сброс выполненных заданий...")
             if reset_weekly_quests(DB_PATH):
                 # Устанавливаем время последнего сброса
-                current_timestamp = datetime.now(timezone.utc).timestamp()
-                set_last_reset_time(DB_PATH, current_timestamp)
+                current_timestamp = time.time()
+                set_last_reset_time(conn, current_timestamp)
                 print("Задания успешно сброшены")
             else:
                 print("Ошибка: не удалось сбросить задания")
@@ -146,6 +169,9 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if conn is not None:
+            conn.close()
 
 
 if __name__ == "__main__":
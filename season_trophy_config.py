@@ -5,25 +5,31 @@ import os
 import json
 from typing import Dict, Any, Optional, List
 
+# Кеш загруженного конфига и индекс трофеев по ключу (конфиг не меняется во время работы процесса)
+_CONFIG_CACHE: Optional[List[Dict[str, Any]]] = None
+_KEY_INDEX: Optional[Dict[str, Dict[str, Any]]] = None
 
-def load_season_trophy_config() -> List[Dict[str, Any]]:
+# Возможные пути к файлу конфига в порядке приоритета (вычисляются один раз при импорте)
+_BASE_DIR = os.path.dirname(__file__)
+_CONFIG_PATHS = tuple(os.path.normpath(path) for path in (
+    os.path.join(_BASE_DIR, '..', 'tsushimaru_app', 'docs', 'assets', 'data', 'season_trophy.json'),
+    os.path.join(_BASE_DIR, '..', 'tsushimaru_app', 'docs', 'season_trophy.json'),
+    '/root/tsushimaru_app/docs/assets/data/season_trophy.json',
+    '/root/tsushimaru_app/docs/season_trophy.json',
+    os.path.join(_BASE_DIR, 'season_trophy.json'),
+    './season_trophy.json'
+))
+
+
+def _read_season_trophy_config() -> Optional[List[Dict[str, Any]]]:
     """
-    Загружает конфиг сезонных трофеев из JSON файла.
+    Читает конфиг сезонных трофеев из JSON файла.
     Путь к файлу определяется относительно директории приложения или фронтенда.
     
     Returns:
-        Список трофеев (массив объектов)
-    """
-    config_paths = [
-        os.path.join(os.path.dirname(__file__), '..', 'tsushimaru_app', 'docs', 'assets', 'data', 'season_trophy.json'),
-        os.path.join(os.path.dirname(__file__), '..', 'tsushimaru_app', 'docs', 'season_trophy.json'),
-        '/root/tsushimaru_app/docs/assets/data/season_trophy.json',
-        '/root/tsushimaru_app/docs/season_trophy.json',
-        os.path.join(os.path.dirname(__file__), 'season_trophy.json'),
-        './season_trophy.json'
-    ]
-    
-    for path in config_paths:
+        Список трофеев (массив объектов) или None, если файл не найден или не удалось его разобрать
+    """
+    for path in _CONFIG_PATHS:
         if os.path.exists(path):
             try:
                 with open(path, 'r', encoding='utf-8') as f:
@@ -34,12 +40,42 @@ def load_season_trophy_config() -> List[Dict[str, Any]]:
                     # Если это объект с ключом trophies, возвращаем его
                     if isinstance(data, dict) and 'trophies' in data:
                         return data['trophies']
-                    return []
+                    print(f"Неверный формат конфига сезонных трофеев в {path}")
+                    return None
             except Exception as e:
                 print(f"Ошибка загрузки конфига сезонных трофеев из {path}: {e}")
                 continue
     
-    return []
+    return None
+
+
+def _get_cached_config() -> Optional[List[Dict[str, Any]]]:
+    """
+    Возвращает закешированный конфиг, читая файл только до первой успешной загрузки
+    (неудачная загрузка не кешируется).
+    
+    Returns:
+        Список трофеев или None, если конфиг загрузить не удалось
+    """
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None:
+        _CONFIG_CACHE = _read_season_trophy_config()
+    return _CONFIG_CACHE
+
+
+def load_season_trophy_config() -> List[Dict[str, Any]]:
+    """
+    Загружает конфиг сезонных трофеев.
+    Файл читается один раз за время работы процесса, дальше используется кеш
+    (неудачная загрузка не кешируется, файл будет прочитан при следующем вызове).
+    
+    Returns:
+        Список трофеев (копии объектов, их можно изменять)
+    """
+    config = _get_cached_config()
+    if config is None:
+        return []
+    return [dict(trophy) for trophy in config]
 
 
 def find_season_trophy_by_key(trophy_key: str) -> Optional[Dict[str, Any]]:
@@ -50,14 +86,19 @@ def find_season_trophy_by_key(trophy_key: str) -> Optional[Dict[str, Any]]:
         trophy_key: Ключ трофея для поиска
     
     Returns:
-        Словарь с данными трофея или None если не найден
+        Словарь с данными трофея или None если не найден (только для чтения)
     """
-    config = load_season_trophy_config()
-    for trophy in config:
-        if trophy.get('key') == trophy_key:
-            return trophy
-    return None
-
-
-
-
+    global _KEY_INDEX
+    if _KEY_INDEX is None:
+        config = _get_cached_config()
+        if config is None:
+            # Индекс строим только по успешно загруженному конфигу
+            return None
+        index = {}
+        for trophy in config:
+            if trophy.get('key'):
+                # При повторяющихся ключах побеждает первый трофей, как при линейном поиске
+                index.setdefault(trophy['key'], trophy)
+        _KEY_INDEX = index
+    
+    return _KEY_INDEX.get(trophy_key)
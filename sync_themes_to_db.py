@@ -8,10 +8,65 @@ import sqlite3
 import sys
 from dotenv import load_dotenv
 
-load_dotenv()
+# Загружаем переменные окружения из .env, только если окружение их еще не задало
+# (например, DB_PATH передан из crontab или родительского процесса)
+if not os.environ.get("DB_PATH"):
+    load_dotenv()
 DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 THEMES_JSON_PATH = os.path.join(os.path.dirname(__file__), 'themes.json')
 
+# Вставка новой темы или обновление существующей (created_at не меняется при обновлении)
+UPSERT_THEME_SQL = '''
+    INSERT INTO profile_themes (theme_key, name, price, css_file, preview_colors, is_default, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, strftime('%s', 'now'))
+    ON CONFLICT(theme_key) DO UPDATE SET
+        name = excluded.name,
+        price = excluded.price,
+        css_file = excluded.css_file,
+        preview_colors = excluded.preview_colors,
+        is_default = excluded.is_default
+'''
+
+# PRAGMA для пакетной синхронизации: меньше fsync, временные данные и кеш страниц в памяти
+SYNC_PRAGMAS_SQL = '''
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-64000;
+'''
+
+
+def _theme_row(theme: dict) -> tuple:
+    """
+    Преобразует тему из themes.json в кортеж полей profile_themes.
+    preview_colors пока остается списком: в JSON сериализуются только изменившиеся темы.
+    """
+    theme_key = theme.get('key')
+    return (
+        theme_key,
+        theme.get('name', theme_key),
+        theme.get('price', 0),
+        theme.get('css_file', f'themes/{theme_key}.css'),
+        theme.get('colors', []),
+        1 if theme.get('is_default', False) else 0,
+    )
+
+
+def _is_theme_unchanged(existing_row, name, price, css_file, colors, is_default) -> bool:
+    """
+    Проверяет, совпадает ли строка темы в БД с данными из themes.json.
+    preview_colors сравнивается в разобранном виде, поэтому строку JSON
+    для сравнения собирать не нужно.
+    """
+    if existing_row is None:
+        return False
+    if existing_row[1:4] != (name, price, css_file) or existing_row[5] != is_default:
+        return False
+    try:
+        return json.loads(existing_row[4]) == colors
+    except (TypeError, ValueError):
+        return False
+
 
 def sync_themes_to_db():
     """
@@ -33,42 +88,34 @@ def sync_themes_to_db():
         print(f"Ошибка чтения themes.json: {e}")
         sys.exit(1)
     
+    # Разбираем темы в кортежи один раз, до открытия подключения к БД
+    rows = [_theme_row(theme) for theme in themes]
+    
     conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
+        # Настройки только для этого подключения (режим журнала БД не меняем)
+        conn.executescript(SYNC_PRAGMAS_SQL)
         cursor = conn.cursor()
         
-        for theme in themes:
-            theme_key = theme.get('key')
-            name = theme.get('name', theme_key)
-            price = theme.get('price', 0)
-            css_file = theme.get('css_file', f'themes/{theme_key}.css')
-            preview_colors = json.dumps(theme.get('colors', []))
-            is_default = 1 if theme.get('is_default', False) else 0
-            
-            # Проверяем, существует ли тема
-            cursor.execute('''
-                SELECT theme_key FROM profile_themes WHERE theme_key = ?
-            ''', (theme_key,))
-            
-            if cursor.fetchone():
-                # Обновляем существующую тему
-                print(f"Обновляем тему: {theme_key}")
-                cursor.execute('''
-                    UPDATE profile_themes 
-                    SET name = ?, price = ?, css_file = ?, preview_colors = ?, is_default = ?
-                    WHERE theme_key = ?
-                ''', (name, price, css_file, preview_colors, is_default, theme_key))
-            else:
-                # Добавляем новую тему
-                print(f"Добавляем тему: {theme_key}")
-                cursor.execute('''
-                    INSERT INTO profile_themes (theme_key, name, price, css_file, preview_colors, is_default, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, strftime('%s', 'now'))
-                ''', (theme_key, name, price, css_file, preview_colors, is_default))
+        # Текущее состояние тем в БД, чтобы не перезаписывать неизменившиеся строки
+        cursor.execute('''
+            SELECT theme_key, name, price, css_file, preview_colors, is_default
+            FROM profile_themes
+        ''')
+        existing = {row[0]: row for row in cursor.fetchall()}
+        changed_rows = [
+            (theme_key, name, price, css_file, json.dumps(colors), is_default)
+            for theme_key, name, price, css_file, colors, is_default in rows
+            if not _is_theme_unchanged(existing.get(theme_key), name, price, css_file, colors, is_default)
+        ]
+        
+        # Добавляем новые и обновляем изменившиеся темы одним пакетом в одной транзакции
+        if changed_rows:
+            cursor.executemany(UPSERT_THEME_SQL, changed_rows)
         
         conn.commit()
-        print(f"Синхронизация завершена! Обработано тем: {len(themes)}")
+        print(f"Синхронизация завершена! Обработано тем: {len(themes)}, изменено: {len(changed_rows)}")
         
     except sqlite3.Error as e:
         print(f"Ошибка при работе с базой данных: {e}")
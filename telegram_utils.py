@@ -1,20 +1,260 @@
 # telegram_utils.py
 # Утилиты для работы с Telegram Bot API
 
-import io
-import json
+import asyncio
 import os
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
 import aiohttp
-from typing import Optional, List, Dict, Any
+import orjson
+from typing import Optional, List, Dict, Any, Awaitable, Callable, IO, Iterable, Iterator, Tuple, Union
 
 MEDIA_GROUP_LIMIT = 9
+# Сколько медиагрупп одного сообщения отправляется одновременно (защита от всплесков и лимитов Telegram).
+# Должно быть не больше TELEGRAM_CONNECTIONS_PER_HOST
+MEDIA_GROUP_CONCURRENCY = 4
+# Максимум одновременных соединений с api.telegram.org в общей сессии
+TELEGRAM_CONNECTIONS_PER_HOST = 16
+
+TELEGRAM_API_BASE_URL = "https://api.telegram.org"
+
+# Повторные попытки запросов к Bot API (429 с retry_after, 5xx и обрывы соединения)
+TELEGRAM_MAX_TRIES = 5
+TELEGRAM_MAX_BACKOFF = 32
+# Максимальное ожидание по retry_after (с); при большем значении 429 возвращается сразу,
+# чтобы не держать HTTP-запрос пользователя открытым на время flood control
+TELEGRAM_MAX_RETRY_AFTER = 10
+
+# Общая HTTP-сессия для всех запросов к Telegram Bot API (создается при первом запросе)
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+# Кэш успешных ответов getChatMember: (chat_id, user_id) -> (время получения, ответ)
+_MEMBER_CACHE: "OrderedDict[Tuple[str, int], Tuple[float, dict]]" = OrderedDict()
+_MEMBER_TTL = 30.0
+_MEMBER_CACHE_MAX_SIZE = 1024
+
+# Ограничения частоты отправки Telegram: ~30 сообщений/с на бота и ~1 сообщение/с в один чат.
+# Глобальный лимит берется с запасом, для чатов допускается короткая пачка (медиагруппа + текст)
+TELEGRAM_GLOBAL_RATE = 25
+TELEGRAM_GLOBAL_BURST = 30
+TELEGRAM_CHAT_RATE = 1
+TELEGRAM_CHAT_BURST = 3
+_CHAT_BUCKETS_MAX_SIZE = 1024
+
+
+class _TokenBucket:
+    """
+    Ограничитель частоты запросов (token bucket): rate токенов в секунду, не больше capacity в запасе.
+    
+    Токен резервируется сразу при вызове acquire (баланс может уйти в минус), а вызывающий код
+    ждет, пока резерв не покроется. Между чтением и изменением баланса нет await, поэтому
+    в одном event loop блокировка не нужна, а очередь обслуживается в порядке вызовов.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+_GLOBAL_BUCKET = _TokenBucket(rate=TELEGRAM_GLOBAL_RATE, capacity=TELEGRAM_GLOBAL_BURST)
+# Ограничители по чатам: chat_id -> _TokenBucket (давно неиспользуемые вытесняются)
+_CHAT_BUCKETS: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+
+
+def _get_chat_bucket(chat_id: str) -> _TokenBucket:
+    """
+    Возвращает ограничитель частоты для чата, создавая его при первом обращении.
+    """
+    key = str(chat_id)
+    bucket = _CHAT_BUCKETS.get(key)
+    if bucket is None:
+        bucket = _TokenBucket(rate=TELEGRAM_CHAT_RATE, capacity=TELEGRAM_CHAT_BURST)
+        _CHAT_BUCKETS[key] = bucket
+        if len(_CHAT_BUCKETS) > _CHAT_BUCKETS_MAX_SIZE:
+            _CHAT_BUCKETS.popitem(last=False)
+    else:
+        _CHAT_BUCKETS.move_to_end(key)
+    return bucket
+
+
+def _json_dumps(value: Any) -> str:
+    """
+    Сериализует значение в JSON-строку (orjson заметно быстрее стандартного json).
+    """
+    return orjson.dumps(value).decode()
+
+
+@lru_cache(maxsize=4)
+def _bot_api_base(bot_token: str) -> str:
+    """
+    Возвращает базовый URL Bot API для токена (токен не меняется за время работы процесса).
+    """
+    return f"{TELEGRAM_API_BASE_URL}/bot{bot_token}"
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    """
+    Возвращает общую aiohttp-сессию, создавая её при первом обращении.
+    
+    Сессия держит пул keep-alive соединений к api.telegram.org, поэтому
+    последующие запросы не тратят время на TCP/TLS-рукопожатие и DNS.
+    """
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            # limit_per_host должен быть не меньше MEDIA_GROUP_CONCURRENCY,
+            # иначе параллельные батчи медиагрупп будут ждать свободного соединения в пуле
+            connector=aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=TELEGRAM_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=600,
+                keepalive_timeout=75
+            ),
+            timeout=aiohttp.ClientTimeout(total=300, connect=10),
+            # Тела запросов json=... сериализуются через orjson
+            json_serialize=_json_dumps
+        )
+    return _SESSION
+
+
+async def close_telegram_session() -> None:
+    """
+    Закрывает общую aiohttp-сессию (вызывать при остановке приложения).
+    """
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+def _reply_markup_json(reply_markup: Union[dict, str]) -> str:
+    """
+    Возвращает reply_markup в виде JSON-строки.
+    Уже сериализованная строка передается как есть, поэтому при рассылке одной и той же
+    клавиатуры многим получателям ее можно сериализовать один раз.
+    """
+    if isinstance(reply_markup, str):
+        return reply_markup
+    return _json_dumps(reply_markup)
+
+
+async def _read_json(response: aiohttp.ClientResponse) -> dict:
+    """
+    Читает тело ответа Telegram API и разбирает его как JSON через orjson.
+    """
+    return orjson.loads(await response.read())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Экспоненциальная задержка перед повторной попыткой (со случайной добавкой против синхронных всплесков).
+    """
+    return min(TELEGRAM_MAX_BACKOFF, 2 ** attempt) + random.random()
+
+
+async def _post_with_retry(
+    url: str,
+    json: Optional[dict] = None,
+    build_form: Optional[Callable[[], Awaitable[aiohttp.FormData]]] = None,
+    chat_id: Optional[str] = None,
+    max_tries: int = TELEGRAM_MAX_TRIES
+) -> dict:
+    """
+    Отправляет POST запрос к Bot API с повторными попытками.
+    
+    - 429: ждет parameters.retry_after из ответа Telegram, если оно не больше
+      TELEGRAM_MAX_RETRY_AFTER; иначе ответ 429 возвращается сразу
+    - 5xx и ошибки соединения: экспоненциальная задержка
+    Остальные ответы (в том числе ошибки 4xx) возвращаются вызывающему коду как есть.
+    Перед каждой попыткой запрос проходит общий ограничитель частоты бота
+    и, если указан chat_id, ограничитель частоты этого чата.
+    
+    Args:
+        url: URL метода Bot API
+        json: Тело запроса в JSON (для запросов без файлов)
+        build_form: Фабрика FormData; вызывается заново на каждую попытку,
+            так как multipart-тело нельзя отправить повторно
+        chat_id: ID чата, в который отправляется сообщение (для ограничения частоты по чату)
+        max_tries: Максимальное количество попыток
+    
+    Returns:
+        Ответ Telegram API (разобранный JSON)
+    """
+    session = await _get_session()
+    chat_bucket = _get_chat_bucket(chat_id) if chat_id is not None else None
+    for attempt in range(max_tries):
+        is_last_attempt = attempt == max_tries - 1
+        if chat_bucket is not None:
+            await chat_bucket.acquire()
+        await _GLOBAL_BUCKET.acquire()
+        request_kwargs = {"data": await build_form()} if build_form else {"json": json}
+        try:
+            async with session.post(url, **request_kwargs) as response:
+                status = response.status
+                try:
+                    result = await _read_json(response)
+                except ValueError:
+                    # Не JSON (например, HTML-страница прокси при 502)
+                    result = {'ok': False, 'error_code': status, 'description': f'HTTP {status}'}
+        except aiohttp.ClientConnectionError as e:
+            if is_last_attempt:
+                raise
+            print(f"Telegram API: ошибка соединения ({e}), попытка {attempt + 1}/{max_tries}")
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        
+        if status == 429 and not is_last_attempt:
+            retry_after = (result.get('parameters') or {}).get('retry_after', 1)
+            if retry_after > TELEGRAM_MAX_RETRY_AFTER:
+                print(f"Telegram API: 429, retry_after {retry_after} с превышает лимит, повтор не выполняется")
+                return result
+            print(f"Telegram API: 429, повтор через {retry_after} с, попытка {attempt + 1}/{max_tries}")
+            await asyncio.sleep(retry_after)
+            continue
+        
+        if status >= 500 and not is_last_attempt:
+            print(f"Telegram API: ошибка сервера {status}, попытка {attempt + 1}/{max_tries}")
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        
+        return result
+    
+    return result
+
+
+async def _reopen_for_retry(file_obj: IO[bytes], opened_files: List[IO[bytes]]) -> IO[bytes]:
+    """
+    Готовит файл к (повторной) отправке.
+    aiohttp закрывает файл после отправки запроса, поэтому для повторной попытки
+    закрытый файл открывается заново по его пути; открытый файл перематывается в начало.
+    Новые файлы добавляются в opened_files, их закрывает вызывающий код.
+    """
+    if file_obj.closed and isinstance(getattr(file_obj, 'name', None), str):
+        file_obj = await asyncio.to_thread(open, file_obj.name, 'rb')
+        opened_files.append(file_obj)
+    else:
+        file_obj.seek(0)
+    return file_obj
 
 
 async def send_telegram_message(
     bot_token: str,
     chat_id: str,
     text: str,
-    reply_markup: Optional[dict] = None,
+    reply_markup: Optional[Union[dict, str]] = None,
     message_thread_id: Optional[str] = None,
     reply_to_message_id: Optional[int] = None
 ) -> dict:
@@ -25,14 +265,14 @@ async def send_telegram_message(
         bot_token: Токен бота
         chat_id: ID чата
         text: Текст сообщения
-        reply_markup: Inline клавиатура (опционально)
+        reply_markup: Inline клавиатура (опционально): dict или уже сериализованная JSON-строка
         message_thread_id: ID темы (опционально)
         reply_to_message_id: ID сообщения для ответа (опционально)
     
     Returns:
         Результат запроса к Telegram API
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = _bot_api_base(bot_token) + "/sendMessage"
     
     data = {
         "chat_id": chat_id,
@@ -44,26 +284,24 @@ async def send_telegram_message(
         data["message_thread_id"] = message_thread_id
     
     if reply_markup:
-        data["reply_markup"] = json.dumps(reply_markup)
+        data["reply_markup"] = _reply_markup_json(reply_markup)
     
     if reply_to_message_id:
         data["reply_to_message_id"] = reply_to_message_id
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=data) as response:
-            result = await response.json()
-            
-            # Проверяем статус ответа от Telegram API
-            if not result.get('ok'):
-                error_code = result.get('error_code', 'unknown')
-                description = result.get('description', 'Unknown error')
-                raise Exception(
-                    f"Telegram API error (sendMessage): "
-                    f"error_code={error_code}, description={description}, "
-                    f"chat_id={chat_id}, message_thread_id={message_thread_id}"
-                )
-            
-            return result
+    result = await _post_with_retry(url, json=data, chat_id=chat_id)
+    
+    # Проверяем статус ответа от Telegram API
+    if not result.get('ok'):
+        error_code = result.get('error_code', 'unknown')
+        description = result.get('description', 'Unknown error')
+        raise Exception(
+            f"Telegram API error (sendMessage): "
+            f"error_code={error_code}, description={description}, "
+            f"chat_id={chat_id}, message_thread_id={message_thread_id}"
+        )
+    
+    return result
 
 
 async def send_telegram_single_media(
@@ -72,7 +310,7 @@ async def send_telegram_single_media(
     media_type: str,  # 'photo' или 'video'
     media_path: str,
     caption: str = "",
-    reply_markup: Optional[dict] = None,
+    reply_markup: Optional[Union[dict, str]] = None,
     message_thread_id: Optional[str] = None
 ) -> dict:
     """
@@ -84,7 +322,7 @@ async def send_telegram_single_media(
         media_type: Тип медиа ('photo' или 'video')
         media_path: Путь к файлу медиа
         caption: Подпись к медиа (опционально)
-        reply_markup: Inline клавиатура (опционально)
+        reply_markup: Inline клавиатура (опционально): dict или уже сериализованная JSON-строка
         message_thread_id: ID темы (опционально)
     
     Returns:
@@ -100,9 +338,14 @@ async def send_telegram_single_media(
         field_name = 'video'
         filename = os.path.basename(media_path)
     
-    url = f"https://api.telegram.org/bot{bot_token}/{endpoint}"
+    url = f"{_bot_api_base(bot_token)}/{endpoint}"
+    
+    # Файл открывается в пуле потоков, а aiohttp читает и отправляет его потоково,
+    # тоже вне event loop, поэтому большие видео не блокируют обработку других запросов
+    opened_files = [await asyncio.to_thread(open, media_path, 'rb')]
     
-    with open(media_path, 'rb') as media_file:
+    async def _build_form() -> aiohttp.FormData:
+        media_file = await _reopen_for_retry(opened_files[-1], opened_files)
         data = aiohttp.FormData()
         data.add_field('chat_id', chat_id)
         data.add_field(field_name, media_file, filename=filename)
@@ -113,23 +356,26 @@ async def send_telegram_single_media(
             data.add_field('message_thread_id', message_thread_id)
         
         if reply_markup:
-            data.add_field('reply_markup', json.dumps(reply_markup))
+            data.add_field('reply_markup', _reply_markup_json(reply_markup))
+        return data
+    
+    try:
+        result = await _post_with_retry(url, build_form=_build_form, chat_id=chat_id)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=data) as response:
-                result = await response.json()
-                
-                # Проверяем статус ответа от Telegram API
-                if not result.get('ok'):
-                    error_code = result.get('error_code', 'unknown')
-                    description = result.get('description', 'Unknown error')
-                    raise Exception(
-                        f"Telegram API error (send{media_type.capitalize()}): "
-                        f"error_code={error_code}, description={description}, "
-                        f"chat_id={chat_id}, message_thread_id={message_thread_id}"
-                    )
-                
-                return result
+        # Проверяем статус ответа от Telegram API
+        if not result.get('ok'):
+            error_code = result.get('error_code', 'unknown')
+            description = result.get('description', 'Unknown error')
+            raise Exception(
+                f"Telegram API error (send{media_type.capitalize()}): "
+                f"error_code={error_code}, description={description}, "
+                f"chat_id={chat_id}, message_thread_id={message_thread_id}"
+            )
+        
+        return result
+    finally:
+        for media_file in opened_files:
+            media_file.close()
 
 
 async def send_telegram_media_group(
@@ -141,77 +387,84 @@ async def send_telegram_media_group(
 ) -> dict:
     """
     Отправляет медиагруппу (фото/видео) в Telegram через Bot API.
-    Может работать с путями к файлам или готовыми BytesIO буферами.
+    Может работать с путями к файлам или готовыми буферами (BytesIO или открытыми файлами).
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMediaGroup"
+    url = _bot_api_base(bot_token) + "/sendMediaGroup"
 
     media_payload = []
-    file_buffers = []
-    filenames = []
-
-    for index, item in enumerate(media_items):
-        attach_id = f'media_{index}'
-        media_payload.append({
-            "type": item.get("type", "photo"),
-            "media": f"attach://{attach_id}"
-        })
-        
-        # Проверяем, передан ли уже готовый буфер или путь к файлу
-        file_buffer = item.get("buffer")
-        file_path = item.get("path")
-        
-        if file_buffer:
-            # Используем готовый BytesIO буфер
-            file_buffers.append(file_buffer)
-            filename = item.get("filename") or os.path.basename(file_path or f'media_{index}')
-            filenames.append(filename)
-        elif file_path:
-            # Читаем файл в память (BytesIO)
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-                file_buffers.append(io.BytesIO(file_data))
-                filenames.append(os.path.basename(file_path))
-
-    # Создаем FormData ПОСЛЕ сбора всех данных
-    data = aiohttp.FormData()
-    data.add_field('chat_id', chat_id)
-    data.add_field('media', json.dumps(media_payload))
-    data.add_field('parse_mode', 'HTML')
+    # Вложения: (имя поля attach://, файл, имя файла) - собираются за один проход
+    attachments = []
+    opened_files = []
 
-    if message_thread_id:
-        data.add_field('message_thread_id', message_thread_id)
+    try:
+        for index, item in enumerate(media_items):
+            attach_id = f'media_{index}'
+            media_payload.append({
+                "type": item.get("type", "photo"),
+                "media": f"attach://{attach_id}"
+            })
+            
+            # Проверяем, передан ли уже готовый буфер или путь к файлу
+            file_buffer = item.get("buffer")
+            file_path = item.get("path")
+            
+            if file_buffer:
+                # Используем готовый буфер (BytesIO или открытый файл)
+                filename = item.get("filename") or os.path.basename(file_path or attach_id)
+                attachments.append((attach_id, file_buffer, filename))
+            elif file_path:
+                # Открываем файл в пуле потоков - aiohttp отправит его потоково, не читая целиком в память
+                media_file = await asyncio.to_thread(open, file_path, 'rb')
+                opened_files.append(media_file)
+                attachments.append((attach_id, media_file, os.path.basename(file_path)))
 
-    if reply_to_message_id:
-        data.add_field('reply_to_message_id', str(reply_to_message_id))
+        async def _build_form() -> aiohttp.FormData:
+            # Создаем FormData ПОСЛЕ сбора всех данных (заново на каждую попытку)
+            data = aiohttp.FormData()
+            data.add_field('chat_id', chat_id)
+            data.add_field('media', _json_dumps(media_payload))
+            data.add_field('parse_mode', 'HTML')
 
-    # Добавляем все файлы в FormData
-    for index, file_buffer in enumerate(file_buffers):
-        file_buffer.seek(0)
-        data.add_field(f'media_{index}', file_buffer, filename=filenames[index])
+            if message_thread_id:
+                data.add_field('message_thread_id', message_thread_id)
 
-    # Отправляем один POST запрос после добавления всех данных
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=data) as response:
-            result = await response.json()
-            
-            # Проверяем статус ответа от Telegram API
-            if not result.get('ok'):
-                error_code = result.get('error_code', 'unknown')
-                description = result.get('description', 'Unknown error')
-                raise Exception(
-                    f"Telegram API error (sendMediaGroup): "
-                    f"error_code={error_code}, description={description}, "
-                    f"chat_id={chat_id}, message_thread_id={message_thread_id}, "
-                    f"media_count={len(media_items)}"
-                )
-            
-            return result
+            if reply_to_message_id:
+                data.add_field('reply_to_message_id', str(reply_to_message_id))
+
+            # Добавляем все файлы в FormData
+            for index, (attach_id, file_buffer, filename) in enumerate(attachments):
+                file_buffer = await _reopen_for_retry(file_buffer, opened_files)
+                attachments[index] = (attach_id, file_buffer, filename)
+                data.add_field(attach_id, file_buffer, filename=filename)
+            return data
+
+        # Отправляем один POST запрос после добавления всех данных
+        result = await _post_with_retry(url, build_form=_build_form, chat_id=chat_id)
+        
+        # Проверяем статус ответа от Telegram API
+        if not result.get('ok'):
+            error_code = result.get('error_code', 'unknown')
+            description = result.get('description', 'Unknown error')
+            raise Exception(
+                f"Telegram API error (sendMediaGroup): "
+                f"error_code={error_code}, description={description}, "
+                f"chat_id={chat_id}, message_thread_id={message_thread_id}, "
+                f"media_count={len(media_items)}"
+            )
+        
+        return result
+    finally:
+        for media_file in opened_files:
+            media_file.close()
 
 
-def _chunk_media_items(items: List[Dict[str, str]], chunk_size: int) -> List[List[Dict[str, str]]]:
+def _chunk_media_items(items: Iterable[Dict[str, str]], chunk_size: int) -> Iterator[List[Dict[str, str]]]:
     if chunk_size <= 0:
-        return [items]
-    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        yield list(items)
+        return
+    items_iter = iter(items)
+    while chunk := list(islice(items_iter, chunk_size)):
+        yield chunk
 
 
 async def send_media_to_telegram_group(
@@ -219,12 +472,16 @@ async def send_media_to_telegram_group(
     chat_id: str,
     media_items: List[Dict[str, str]],
     message_text: str = "",
-    reply_markup: Optional[dict] = None,
+    reply_markup: Optional[Union[dict, str]] = None,
     message_thread_id: Optional[str] = None
 ) -> dict:
     """
     Отправляет смешанную медиагруппу (фото и видео), разбивая по лимиту Telegram и добавляя текст.
     """
+    # Нечего отправлять - не делаем запрос к Telegram API
+    if not media_items and not message_text:
+        return {"ok": True, "skipped": "empty"}
+
     if not media_items:
         return await send_telegram_message(
             bot_token=bot_token,
@@ -249,54 +506,85 @@ async def send_media_to_telegram_group(
             message_thread_id=message_thread_id,
         )
 
-    # Читаем ВСЕ файлы в память ПЕРЕД началом отправки батчей
-    # Это гарантирует, что файлы доступны даже если временная директория удалится
-    media_items_with_buffers = []
-    for item in media_items:
-        file_path = item.get("path")
-        if not file_path:
-            media_items_with_buffers.append(item)
-            continue
-        
-        # Читаем файл в память (BytesIO)
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
-            buffer = io.BytesIO(file_data)
-        
-        # Создаем новый элемент с буфером вместо пути
-        item_with_buffer = item.copy()
-        item_with_buffer["buffer"] = buffer
-        item_with_buffer["filename"] = os.path.basename(file_path)
-        media_items_with_buffers.append(item_with_buffer)
-    
-    batches = _chunk_media_items(media_items_with_buffers, MEDIA_GROUP_LIMIT)
-    first_message_id: Optional[int] = None
-    last_response: Optional[dict] = None
-
-    for batch_index, batch in enumerate(batches):
-        # Первый батч отправляем без reply, последующие - как ответ на предыдущий
-        reply_to_id = first_message_id if batch_index > 0 else None
-        
+    async def _send_batch(batch_index: int, batch: List[Dict[str, Any]], reply_to_id: Optional[int]) -> dict:
         try:
-            batch_result = await send_telegram_media_group(
+            return await send_telegram_media_group(
                 bot_token=bot_token,
                 chat_id=chat_id,
                 media_items=batch,
                 message_thread_id=message_thread_id,
                 reply_to_message_id=reply_to_id,
             )
-            
-            if first_message_id is None and batch_result.get('ok') and batch_result.get('result'):
-                first_message = batch_result['result'][0]
-                first_message_id = first_message.get('message_id')
-
-            last_response = batch_result
         except Exception as e:
             # Логируем ошибку перед пробросом
             print(f"ERROR in send_media_to_telegram_group (batch {batch_index}): {e}")
             print(f"  Full error details: {repr(e)}")
             raise
 
+    # Открываем ВСЕ файлы ПЕРЕД началом отправки батчей
+    # Открытый файл остается доступным, даже если временная директория удалится,
+    # а aiohttp отправляет его потоково, без чтения целиком в память.
+    # Файлы открываются параллельно в пуле потоков, не блокируя event loop
+    file_paths = [item["path"] for item in media_items if item.get("path")]
+    open_results = await asyncio.gather(
+        *[asyncio.to_thread(open, file_path, 'rb') for file_path in file_paths],
+        return_exceptions=True,
+    )
+    opened_files = [f for f in open_results if not isinstance(f, BaseException)]
+    try:
+        for open_result in open_results:
+            if isinstance(open_result, BaseException):
+                raise open_result
+        
+        files_iter = iter(opened_files)
+        media_items_with_buffers = []
+        for item in media_items:
+            file_path = item.get("path")
+            if not file_path:
+                media_items_with_buffers.append(item)
+                continue
+            
+            # Создаем новый элемент с открытым файлом вместо пути
+            item_with_buffer = item.copy()
+            item_with_buffer["buffer"] = next(files_iter)
+            item_with_buffer["filename"] = os.path.basename(file_path)
+            media_items_with_buffers.append(item_with_buffer)
+
+        batches = list(_chunk_media_items(media_items_with_buffers, MEDIA_GROUP_LIMIT))
+
+        # Первый батч отправляем без reply, последующие - как ответ на первый
+        first_response = await _send_batch(0, batches[0], None)
+        first_message_id: Optional[int] = None
+        if first_response.get('ok') and first_response.get('result'):
+            first_message = first_response['result'][0]
+            first_message_id = first_message.get('message_id')
+
+        # Остальные батчи зависят только от первого, поэтому отправляем их параллельно,
+        # но не больше MEDIA_GROUP_CONCURRENCY одновременно
+        semaphore = asyncio.Semaphore(MEDIA_GROUP_CONCURRENCY)
+
+        async def _send_batch_limited(batch_index: int, batch: List[Dict[str, Any]]) -> dict:
+            async with semaphore:
+                return await _send_batch(batch_index, batch, first_message_id)
+
+        rest_tasks = [
+            asyncio.create_task(_send_batch_limited(batch_index, batch))
+            for batch_index, batch in enumerate(batches[1:], start=1)
+        ]
+        try:
+            rest_responses = await asyncio.gather(*rest_tasks)
+        except BaseException:
+            # При ошибке одного батча отменяем остальные и дожидаемся их завершения,
+            # чтобы они не продолжили отправку после закрытия файлов в finally
+            for task in rest_tasks:
+                task.cancel()
+            await asyncio.gather(*rest_tasks, return_exceptions=True)
+            raise
+        last_response = rest_responses[-1] if rest_responses else first_response
+    finally:
+        for media_file in opened_files:
+            media_file.close()
+
     if not message_text:
         return last_response or {"ok": True}
 
@@ -329,17 +617,33 @@ async def get_chat_member(
         chat_id: ID чата (группы)
         user_id: ID пользователя
     
+    Успешные ответы кэшируются на _MEMBER_TTL секунд, чтобы повторные
+    проверки одного участника не делали запрос к Telegram API.
+    
     Returns:
         Результат запроса к Telegram API с информацией об участнике
     """
-    url = f"https://api.telegram.org/bot{bot_token}/getChatMember"
+    key = (str(chat_id), int(user_id))
+    entry = _MEMBER_CACHE.get(key)
+    if entry is not None and time.monotonic() - entry[0] < _MEMBER_TTL:
+        _MEMBER_CACHE.move_to_end(key)
+        return entry[1]
+    
+    url = _bot_api_base(bot_token) + "/getChatMember"
     
     data = {
         "chat_id": chat_id,
         "user_id": user_id
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=data) as response:
-            return await response.json()
+    result = await _post_with_retry(url, json=data)
+    
+    # Кэшируем только успешные ответы, ошибки всегда перезапрашиваем
+    if result.get('ok'):
+        _MEMBER_CACHE[key] = (time.monotonic(), result)
+        _MEMBER_CACHE.move_to_end(key)
+        if len(_MEMBER_CACHE) > _MEMBER_CACHE_MAX_SIZE:
+            _MEMBER_CACHE.popitem(last=False)
+    
+    return result
 
@@ -3,13 +3,23 @@
 
 import os
 import json
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
+# Индекс трофеев по ключу и конфиг, по которому он построен
+_INDEX_CONFIG: Optional[Dict[str, Any]] = None
+_TROPHY_INDEX: Dict[str, Dict[str, Any]] = {}
 
+
+@lru_cache(maxsize=1)
 def load_trophy_config() -> Dict[str, Any]:
     """
     Загружает конфиг трофеев из JSON файла.
     Путь к файлу определяется относительно директории приложения или фронтенда.
+    
+    Файл читается один раз за время работы процесса (неудачная загрузка не кешируется).
+    Возвращается общий объект: вызывающий код не должен его изменять.
+    Для перечитывания файла используйте load_trophy_config.cache_clear().
     """
     config_paths = [
         os.path.join(os.path.dirname(__file__), '..', 'tsushimaru_app', 'docs', 'assets', 'data', 'trophies.json'),
@@ -32,6 +42,24 @@ def load_trophy_config() -> Dict[str, Any]:
     raise Exception("Не удалось загрузить конфиг трофеев")
 
 
+def _get_trophy_index(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Возвращает индекс трофеев по ключу для переданного конфига.
+    Индекс строится один раз и перестраивается, только если передан другой объект конфига
+    (например, после load_trophy_config.cache_clear()).
+    """
+    global _INDEX_CONFIG, _TROPHY_INDEX
+    if config is not _INDEX_CONFIG:
+        index = {}
+        for trophy in config.get('trophies', []):
+            if trophy.get('key'):
+                # При повторяющихся ключах побеждает первый трофей, как при линейном поиске
+                index.setdefault(trophy['key'], trophy)
+        _TROPHY_INDEX = index
+        _INDEX_CONFIG = config
+    return _TROPHY_INDEX
+
+
 def find_trophy_by_key(config: Dict[str, Any], trophy_key: str) -> Optional[Dict[str, Any]]:
     """
     Находит трофей по ключу в конфиге.
@@ -43,9 +71,4 @@ def find_trophy_by_key(config: Dict[str, Any], trophy_key: str) -> Optional[Dict
     Returns:
         Словарь с данными трофея или None если не найден
     """
-    trophies = config.get('trophies', [])
-    for trophy in trophies:
-        if trophy.get('key') == trophy_key:
-            return trophy
-    return None
-
+    return _get_trophy_index(config).get(trophy_key)
@@ -2,8 +2,10 @@
 # update_rotation_week.py
 # Скрипт для автоматического обновления недели ротации каждую пятницу в 18:00 МСК
 
+import logging
 import os
 import sys
+import time
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 
@@ -17,6 +19,38 @@ load_dotenv()
 
 DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 
+logger = logging.getLogger(__name__)
+
+# Файл-метка успешного обновления: при частом запуске по cron позволяет не обращаться к БД
+ROTATION_STAMP_PATH = "/tmp/rotation_last_ok"
+ROTATION_STAMP_TTL = 3600  # Метка считается свежей в течение часа
+
+
+def was_updated_recently() -> bool:
+    """
+    Проверяет по файлу-метке, обновлялась ли неделя в течение последнего часа.
+    
+    Returns:
+        True если метка свежая, иначе False (в том числе если метки нет)
+    """
+    try:
+        return time.time() - os.path.getmtime(ROTATION_STAMP_PATH) < ROTATION_STAMP_TTL
+    except OSError:
+        return False
+
+
+def save_rotation_stamp() -> None:
+    """
+    Обновляет время изменения файла-метки после успешного обновления недели.
+    """
+    try:
+        with open(ROTATION_STAMP_PATH, 'a'):
+            pass
+        os.utime(ROTATION_STAMP_PATH, None)
+    except OSError as e:
+        logger.warning(f"Не удалось записать метку обновления {ROTATION_STAMP_PATH}: {e}")
+
+
 def should_update_week() -> bool:
     """
     Проверяет, нужно ли обновлять неделю.
@@ -40,6 +74,10 @@ def should_update_week() -> bool:
     if now_moscow.hour < 18:
         return False
     
+    # Неделю только что обновили (этот или параллельный запуск) - в БД не заглядываем
+    if was_updated_recently():
+        return False
+    
     # Получаем последнее время обновления из БД
     week_info = get_rotation_week_info(DB_PATH)
     if not week_info:
@@ -65,34 +103,36 @@ def main():
     Главная функция скрипта.
     """
     try:
+        # Проверяем, нужно ли обновлять (до обращения к БД за текущей неделей)
+        if not should_update_week():
+            logger.info("Обновление не требуется")
+            return
+        
         # Получаем текущую неделю
         current_week = get_current_rotation_week(DB_PATH)
         
         if current_week is None:
-            print("Ошибка: не удалось получить текущую неделю из БД")
+            logger.error("Ошибка: не удалось получить текущую неделю из БД")
             sys.exit(1)
         
-        print(f"Текущая неделя: {current_week}")
+        logger.info(f"Текущая неделя: {current_week}")
         
-        # Проверяем, нужно ли обновлять
-        if should_update_week():
-            print("Обновление недели ротации...")
-            if update_rotation_week(DB_PATH):
-                new_week = get_current_rotation_week(DB_PATH)
-                print(f"Неделя успешно обновлена. Новая неделя: {new_week}")
-            else:
-                print("Ошибка: не удалось обновить неделю")
-                sys.exit(1)
+        logger.info("Обновление недели ротации...")
+        new_week = update_rotation_week(DB_PATH)
+        if new_week is not None:
+            save_rotation_stamp()
+            logger.info(f"Неделя успешно обновлена. Новая неделя: {new_week}")
         else:
-            print("Обновление не требуется")
+            logger.error("Ошибка: не удалось обновить неделю")
+            sys.exit(1)
     
-    except Exception as e:
-        print(f"Ошибка выполнения скрипта: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        # logger.exception сам добавляет traceback в запись
+        logger.exception("Ошибка выполнения скрипта")
         sys.exit(1)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stdout)
     main()
 
@@ -2,6 +2,7 @@
 # update_top50_prize.py
 # Скрипт для автоматического обновления приза Top50 каждый день в 9:00 МСК
 
+import logging
 import os
 import sys
 from dotenv import load_dotenv
@@ -16,6 +17,15 @@ load_dotenv()
 
 DB_PATH = os.getenv("DB_PATH", "/root/miniapp_api/app.db")
 
+logger = logging.getLogger(__name__)
+
+# Цикл значений приза Top50 и переход к следующему значению (после последнего - снова первое)
+_PRIZE_CYCLE = (0, 60, 120, 180, 240, 300, 350)
+_NEXT_PRIZE = {
+    value: _PRIZE_CYCLE[(index + 1) % len(_PRIZE_CYCLE)]
+    for index, value in enumerate(_PRIZE_CYCLE)
+}
+
 
 def get_next_prize_value(current_value: int) -> int:
     """
@@ -36,17 +46,7 @@ def get_next_prize_value(current_value: int) -> int:
     Returns:
         Следующее значение приза
     """
-    mapping = {
-        0: 60,
-        60: 120,
-        120: 180,
-        180: 240,
-        240: 300,
-        300: 350,
-        350: 0
-    }
-    
-    return mapping.get(current_value, 0)
+    return _NEXT_PRIZE.get(current_value, 0)
 
 
 def main():
@@ -58,30 +58,30 @@ def main():
         current_value = get_top50_current_prize(DB_PATH)
         
         if current_value is None:
-            print("Ошибка: не удалось получить текущее значение приза Top50 из БД")
+            logger.error("Ошибка: не удалось получить текущее значение приза Top50 из БД")
             sys.exit(1)
         
-        print(f"Текущее значение приза: {current_value}")
+        logger.info(f"Текущее значение приза: {current_value}")
         
         # Определяем следующее значение
         next_value = get_next_prize_value(current_value)
-        print(f"Обновление приза Top50: {current_value} → {next_value}")
+        logger.info(f"Обновление приза Top50: {current_value} → {next_value}")
         
         # Обновляем значение в БД
         if update_top50_current_prize(DB_PATH, next_value):
-            print(f"Приз Top50 успешно обновлен. Новое значение: {next_value}")
+            logger.info(f"Приз Top50 успешно обновлен. Новое значение: {next_value}")
         else:
-            print("Ошибка: не удалось обновить приз Top50")
+            logger.error("Ошибка: не удалось обновить приз Top50")
             sys.exit(1)
     
-    except Exception as e:
-        print(f"Ошибка выполнения скрипта: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        # logger.exception сам добавляет traceback в запись
+        logger.exception("Ошибка выполнения скрипта")
         sys.exit(1)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", stream=sys.stdout)
     main()
 
 
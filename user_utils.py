@@ -5,6 +5,23 @@ from fastapi import HTTPException
 from typing import Dict, Tuple, Optional
 from db import get_user
 
+# Поля профиля в ответе API и значения по умолчанию (в порядке вывода после user_id)
+_PROFILE_FIELDS = (
+    ("real_name", ""),
+    ("psn_id", ""),
+    ("platforms", []),
+    ("modes", []),
+    ("goals", []),
+    ("difficulties", []),
+    ("birthday", None),
+    ("avatar_url", None),
+    ("balance", 0),
+    ("purified", 0),
+    ("active_theme_key", "default"),
+)
+# Поля со списком по умолчанию: общий список из _PROFILE_FIELDS нельзя отдавать в ответ
+_PROFILE_LIST_FIELDS = ("platforms", "modes", "goals", "difficulties")
+
 
 def get_user_with_psn(DB_PATH: str, user_id: int) -> Tuple[Dict, str]:
     """
@@ -56,18 +73,10 @@ def format_profile_response(profile: Optional[Dict], user_id: int) -> Dict:
             detail="Профиль не найден"
         )
     
-    return {
-        "user_id": user_id,
-        "real_name": profile.get("real_name", ""),
-        "psn_id": profile.get("psn_id", ""),
-        "platforms": profile.get("platforms", []),
-        "modes": profile.get("modes", []),
-        "goals": profile.get("goals", []),
-        "difficulties": profile.get("difficulties", []),
-        "birthday": profile.get("birthday"),
-        "avatar_url": profile.get("avatar_url"),
-        "balance": profile.get("balance", 0),
-        "purified": profile.get("purified", 0),
-        "active_theme_key": profile.get("active_theme_key", "default")
-    }
-
+    response = {"user_id": user_id}
+    response.update({key: profile.get(key, default) for key, default in _PROFILE_FIELDS})
+    # Каждый ответ получает собственный пустой список вместо общего значения по умолчанию
+    for key in _PROFILE_LIST_FIELDS:
+        if key not in profile:
+            response[key] = []
+    return response